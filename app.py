@@ -1,129 +1,337 @@
 import streamlit as st
 import sqlite3
+import threading
 import pandas as pd
 import io
 import matplotlib.pyplot as plt
 from streamlit_option_menu import option_menu
+from contextlib import contextmanager
 from datetime import datetime
-import matplotlib.backends.backend_pdf
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.platypus import PageBreak, SimpleDocTemplate, Table, TableStyle
 
 # ----------------- Database -----------------
-conn = sqlite3.connect("records.db", check_same_thread=False)
-cursor = conn.cursor()
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS products (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    sno TEXT,
-    date_of_intervention TEXT,
-    yard_location TEXT,
-    batchno TEXT,
-    hold_no TEXT,
-    material TEXT,
-    lots_id TEXT,
-    sgs_reference_id TEXT,
-    planned_qty REAL,
-    loaded_qty REAL,
-    balance_qty REAL,
-    dry_colour TEXT,
-    wet_colour TEXT,
-    loi REAL,
-    mgo REAL,
-    sio2 REAL,
-    asbestos TEXT,
-    truck_no TEXT,
-    remarks TEXT,
-    vessel_name TEXT,
-    sgs_report_id TEXT
-)
-""")
-conn.commit()
+@st.cache_resource(show_spinner=False)
+def _init_db():
+    # Cached as a resource so the writer connection and schema setup run
+    # once per process instead of on every script import/hot-reload.
+    # isolation_level=None leaves transaction control to the explicit
+    # BEGIN/COMMIT in the write helpers; the larger statement cache keeps
+    # the hot INSERT/UPDATE statements prepared across calls.
+    conn = sqlite3.connect("records.db", check_same_thread=False,
+                           cached_statements=256, isolation_level=None)
+    cursor = conn.cursor()
+
+    # WAL lets readers proceed while a write is in flight, and NORMAL sync
+    # amortizes fsyncs across checkpoints instead of paying one per commit.
+    for pragma in (
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "temp_store=MEMORY",
+        "cache_size=-65536",
+        "mmap_size=268435456",
+        "busy_timeout=5000",
+        "foreign_keys=ON",
+    ):
+        cursor.execute(f"PRAGMA {pragma}")
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sno TEXT,
+        date_of_intervention TEXT,
+        yard_location TEXT,
+        batchno TEXT,
+        hold_no TEXT,
+        material TEXT,
+        lots_id TEXT,
+        sgs_reference_id TEXT,
+        planned_qty REAL,
+        loaded_qty REAL,
+        balance_qty REAL,
+        dry_colour TEXT,
+        wet_colour TEXT,
+        loi REAL,
+        mgo REAL,
+        sio2 REAL,
+        asbestos TEXT,
+        truck_no TEXT,
+        remarks TEXT,
+        vessel_name TEXT,
+        sgs_report_id TEXT
+    )
+    """)
+
+    for col in ("batchno", "material", "vessel_name"):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_products_{col} ON products({col})")
+
+    # Full-text mirror of the searchable columns; keyword search hits the
+    # inverted index instead of scanning the whole table with LIKE.
+    fts_existed = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='products_fts'"
+    ).fetchone() is not None
+    try:
+        cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+            batchno, material, vessel_name,
+            content='products', content_rowid='id'
+        )
+        """)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, batchno, material, vessel_name)
+            VALUES (new.id, new.batchno, new.material, new.vessel_name);
+        END
+        """)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, batchno, material, vessel_name)
+            VALUES ('delete', old.id, old.batchno, old.material, old.vessel_name);
+        END
+        """)
+        cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, batchno, material, vessel_name)
+            VALUES ('delete', old.id, old.batchno, old.material, old.vessel_name);
+            INSERT INTO products_fts(rowid, batchno, material, vessel_name)
+            VALUES (new.id, new.batchno, new.material, new.vessel_name);
+        END
+        """)
+        if not fts_existed:
+            cursor.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+        fts_enabled = True
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 — search falls back to LIKE.
+        fts_enabled = False
+
+    return conn, fts_enabled
+
+def get_conn():
+    return _init_db()[0]
+
+def _fts_enabled():
+    return _init_db()[1]
+
+# One writer, N readers: under WAL, read-only connections proceed while
+# the single (locked) writer commits. Readers are cached per thread.
+_write_lock = threading.Lock()
+_reader_local = threading.local()
+
+def _get_reader():
+    reader = getattr(_reader_local, "conn", None)
+    if reader is None:
+        get_conn()  # ensure the database file and schema exist
+        reader = sqlite3.connect("file:records.db?mode=ro", uri=True)
+        reader.execute("PRAGMA busy_timeout=5000")
+        reader.execute("PRAGMA mmap_size=268435456")
+        _reader_local.conn = reader
+    return reader
 
 # ----------------- Helpers -----------------
+@st.cache_resource(show_spinner=False)
+def _db_state():
+    # The mutation counter lives in a process-global resource: the
+    # cache_data entries it keys are shared by every session, so a
+    # per-session counter would serve other sessions stale reads.
+    return {"version": 0}
+
+def _db_version():
+    return _db_state()["version"]
+
+def _bump_db_version():
+    _db_state()["version"] += 1
+
+_INSERT_SQL = """
+INSERT INTO products (
+    sno,date_of_intervention,yard_location,batchno,hold_no,material,
+    lots_id,sgs_reference_id,planned_qty,loaded_qty,balance_qty,
+    dry_colour,wet_colour,loi,mgo,sio2,asbestos,truck_no,
+    remarks,vessel_name,sgs_report_id
+) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+"""
+
+_UPDATE_SQL = """
+UPDATE products SET
+    sno=?,date_of_intervention=?,yard_location=?,batchno=?,hold_no=?,material=?,
+    lots_id=?,sgs_reference_id=?,planned_qty=?,loaded_qty=?,balance_qty=?,
+    dry_colour=?,wet_colour=?,loi=?,mgo=?,sio2=?,asbestos=?,truck_no=?,
+    remarks=?,vessel_name=?,sgs_report_id=?
+WHERE id=?
+"""
+
+@contextmanager
+def _write_tx():
+    # BEGIN IMMEDIATE takes the write lock up front so a write cannot
+    # hit SQLITE_BUSY midway; the rollback guard matters because a
+    # failed statement would otherwise strand the shared writer inside
+    # an open transaction and every later BEGIN would fail.
+    conn = get_conn()
+    with _write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+    _bump_db_version()
+
 def add_record(data):
-    cursor.execute("""
-    INSERT INTO products (
-        sno,date_of_intervention,yard_location,batchno,hold_no,material,
-        lots_id,sgs_reference_id,planned_qty,loaded_qty,balance_qty,
-        dry_colour,wet_colour,loi,mgo,sio2,asbestos,truck_no,
-        remarks,vessel_name,sgs_report_id
-    ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-    """, data)
-    conn.commit()
-
-def fetch_records(query="SELECT * FROM products", params=()):
-    return pd.read_sql_query(query, conn, params=params)
+    with _write_tx() as conn:
+        conn.execute(_INSERT_SQL, data)
+
+def add_records_bulk(rows):
+    with _write_tx() as conn:
+        conn.executemany(_INSERT_SQL, rows)
+
+COLUMNS = (
+    "id", "sno", "date_of_intervention", "yard_location", "batchno", "hold_no",
+    "material", "lots_id", "sgs_reference_id", "planned_qty", "loaded_qty",
+    "balance_qty", "dry_colour", "wet_colour", "loi", "mgo", "sio2",
+    "asbestos", "truck_no", "remarks", "vessel_name", "sgs_report_id",
+)
+
+_SELECT_ALL = f"SELECT {', '.join(COLUMNS)} FROM products"
+
+@st.cache_data(show_spinner=False)
+def fetch_records(query=_SELECT_ALL, params=(), db_version=0):
+    # Skip pandas' SQL layer: fetch raw rows and build the frame directly.
+    cur = _get_reader().execute(query, params)
+    columns = [d[0] for d in cur.description]
+    return _shrink_dtypes(pd.DataFrame.from_records(cur.fetchall(), columns=columns))
+
+_AGG_COLUMNS = {"material", "yard_location", "loaded_qty", "planned_qty"}
+
+def agg_by(col, metric, db_version=0):
+    # SQLite aggregates to <=K groups server-side instead of shipping
+    # every row into pandas. Identifiers are whitelisted, not parameters.
+    if col not in _AGG_COLUMNS or metric not in _AGG_COLUMNS:
+        raise ValueError(f"unexpected aggregation columns: {col}, {metric}")
+    df = fetch_records(
+        f"SELECT {col} AS k, SUM({metric}) AS v FROM products GROUP BY {col}",
+        db_version=db_version,
+    )
+    return df.set_index("k")["v"]
 
 def update_record(record_id, data):
-    cursor.execute("""
-    UPDATE products SET 
-        sno=?,date_of_intervention=?,yard_location=?,batchno=?,hold_no=?,material=?,
-        lots_id=?,sgs_reference_id=?,planned_qty=?,loaded_qty=?,balance_qty=?,
-        dry_colour=?,wet_colour=?,loi=?,mgo=?,sio2=?,asbestos=?,truck_no=?,
-        remarks=?,vessel_name=?,sgs_report_id=?
-    WHERE id=?
-    """, (*data, record_id))
-    conn.commit()
+    with _write_tx() as conn:
+        conn.execute(_UPDATE_SQL, (*data, record_id))
 
 def delete_record(record_id):
-    cursor.execute("DELETE FROM products WHERE id=?", (record_id,))
-    conn.commit()
+    with _write_tx() as conn:
+        conn.execute("DELETE FROM products WHERE id=?", (record_id,))
 
 # ----------------- Utilities -----------------
-def rename_columns(df: pd.DataFrame) -> pd.DataFrame:
-    rename_map = {
-        "sno": "S.No",
-        "date_of_intervention": "Date Of Intervention",
-        "yard_location": "Yard Location",
-        "batchno": "Batch No.",
-        "hold_no": "Hold No.",
-        "material": "Material",
-        "lots_id": "Lots ID",
-        "sgs_reference_id": "SGS Reference ID",
-        "planned_qty": "Planned Qty (Tons)",
-        "loaded_qty": "Loaded Qty (Tons)",
-        "balance_qty": "Balance Qty (Tons)",
-        "dry_colour": "Dry Colour",
-        "wet_colour": "Wet Colour",
-        "loi": "LOI",
-        "mgo": "MgO",
-        "sio2": "SiO₂",
-        "asbestos": "Asbestos",
-        "truck_no": "Truck No.",
-        "remarks": "Remarks",
-        "vessel_name": "Vessel Name",
-        "sgs_report_id": "SGS Report ID"
-    }
-    return df.rename(columns=rename_map)
+_RENAME_MAP = {
+    "sno": "S.No",
+    "date_of_intervention": "Date Of Intervention",
+    "yard_location": "Yard Location",
+    "batchno": "Batch No.",
+    "hold_no": "Hold No.",
+    "material": "Material",
+    "lots_id": "Lots ID",
+    "sgs_reference_id": "SGS Reference ID",
+    "planned_qty": "Planned Qty (Tons)",
+    "loaded_qty": "Loaded Qty (Tons)",
+    "balance_qty": "Balance Qty (Tons)",
+    "dry_colour": "Dry Colour",
+    "wet_colour": "Wet Colour",
+    "loi": "LOI",
+    "mgo": "MgO",
+    "sio2": "SiO₂",
+    "asbestos": "Asbestos",
+    "truck_no": "Truck No.",
+    "remarks": "Remarks",
+    "vessel_name": "Vessel Name",
+    "sgs_report_id": "SGS Report ID"
+}
+
+_DTYPE_MAP = {c: "float32" for c in ("planned_qty", "loaded_qty", "balance_qty", "loi", "mgo", "sio2")}
+_DTYPE_MAP.update({c: "category" for c in ("yard_location", "material", "asbestos", "vessel_name")})
+# Display frames carry the presentation names, so cover those too.
+_DTYPE_MAP.update({_RENAME_MAP[c]: t for c, t in list(_DTYPE_MAP.items())})
+
+def _shrink_dtypes(df):
+    # float32 halves the numeric width and category collapses repeated
+    # strings into small integer codes.
+    dtypes = {c: t for c, t in _DTYPE_MAP.items() if c in df.columns}
+    return df.astype(dtypes) if dtypes else df
+
+_DISPLAY_COLUMNS = tuple(c for c in COLUMNS if c != "id")
+# The search listing drops remarks — typically the largest TEXT column —
+# so matches don't drag full rows across the Python boundary.
+_SEARCH_DISPLAY_COLUMNS = tuple(c for c in _DISPLAY_COLUMNS if c != "remarks")
+
+def _display_select(columns):
+    return ", ".join(f'{c} AS "{_RENAME_MAP[c]}"' for c in columns)
+
+def fetch_display(where="", params=(), columns=_DISPLAY_COLUMNS):
+    # SQLite aliases the columns to their presentation names directly,
+    # collapsing the rename + drop passes every page used to repeat.
+    query = f"SELECT id, {_display_select(columns)} FROM products{where}"
+    df = fetch_records(query, params, db_version=_db_version())
+    # Zero-copy view of the id column; no per-row PyLong boxing.
+    ids = df.pop("id").to_numpy()
+    df.index = df.index + 1
+    return ids, df
+
+def fetch_record(record_id):
+    # Full-precision row to seed the update form; saving defaults read
+    # from the float32 display frame would write the widened artifacts
+    # (3.14 -> 3.140000104904175) back into the database.
+    cur = _get_reader().execute(
+        f"SELECT {_display_select(_DISPLAY_COLUMNS)} FROM products WHERE id=?",
+        (record_id,),
+    )
+    return dict(zip((_RENAME_MAP[c] for c in _DISPLAY_COLUMNS), cur.fetchone()))
+
+def get_display_records():
+    # st.cache_data still pays a hash plus a defensive copy per call, so
+    # keep the current table in session state and refresh it only when a
+    # mutation has bumped db_version.
+    if st.session_state.get("_records_db_v") != _db_version():
+        st.session_state["records_display"] = fetch_display()
+        st.session_state["_records_db_v"] = _db_version()
+    return st.session_state["records_display"]
 
 # ----------------- PDF Export -----------------
-def df_to_pdf_bytes(df: pd.DataFrame) -> io.BytesIO:
+_PDF_TABLE_STYLE = TableStyle([
+    ("FONTSIZE", (0, 0), (-1, -1), 5),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
+
+@st.cache_data(show_spinner=False)
+def df_to_pdf_bytes(df: pd.DataFrame) -> bytes:
+    # ReportLab flowables stream straight into the buffer, so memory
+    # stays constant per page instead of holding a raster per figure.
     pdf_bytes = io.BytesIO()
-    pdf_pages = matplotlib.backends.backend_pdf.PdfPages(pdf_bytes)
-    
+    doc = SimpleDocTemplate(pdf_bytes, pagesize=landscape(A4))
+
     max_rows_per_page = 25
-    total_rows = len(df)
-    num_pages = (total_rows // max_rows_per_page) + 1
-    
-    for page in range(num_pages):
-        start = page * max_rows_per_page
-        end = start + max_rows_per_page
-        sub_df = df.iloc[start:end]
-        
-        fig, ax = plt.subplots(figsize=(12, sub_df.shape[0]*0.3 + 1))
-        ax.axis('tight')
-        ax.axis('off')
-        table = ax.table(cellText=sub_df.values, colLabels=sub_df.columns, loc='center', cellLoc='center')
-        table.auto_set_font_size(False)
-        table.set_fontsize(10)
-        table.scale(1, 1.5)
-        
-        pdf_pages.savefig(fig, bbox_inches='tight')
-        plt.close(fig)
-    
-    pdf_pages.close()
-    pdf_bytes.seek(0)
-    return pdf_bytes
+    header = list(df.columns)
+    # One vectorized astype beats per-cell str() during table layout.
+    str_df = df.astype(str)
+    story = []
+    for start in range(0, len(str_df), max_rows_per_page):
+        chunk = str_df.iloc[start:start + max_rows_per_page]
+        table = Table([header] + chunk.values.tolist(), repeatRows=1)
+        table.setStyle(_PDF_TABLE_STYLE)
+        story.append(table)
+        story.append(PageBreak())
+    if story:
+        story.pop()  # no blank page after the last table
+    else:
+        header_only = Table([header])
+        header_only.setStyle(_PDF_TABLE_STYLE)
+        story.append(header_only)
+
+    doc.build(story)
+    return pdf_bytes.getvalue()
 
 # ----------------- Sidebar & Layout -----------------
 st.set_page_config(page_title="Quality Control Management System", layout="wide")
@@ -178,49 +386,68 @@ def add_new_record():
             add_record(data)
             st.success("✅ Record added successfully!")
 
+    st.markdown("### 📤 Bulk Upload (CSV)")
+    csv_file = st.file_uploader("Upload a CSV with the record columns", type="csv")
+    if csv_file is not None and st.button("📥 Import CSV"):
+        bulk_df = pd.read_csv(csv_file)
+        missing = [c for c in _DISPLAY_COLUMNS if c not in bulk_df.columns]
+        if missing:
+            st.error(f"❌ CSV is missing columns: {', '.join(missing)}")
+            return
+        bulk_df = bulk_df[list(_DISPLAY_COLUMNS)]
+        # Missing numeric cells would be stored as NULL and break the
+        # update form's float() defaults; default them to 0.0 the way
+        # the add form does.
+        numeric_cols = [c for c in _DISPLAY_COLUMNS if _DTYPE_MAP.get(c) == "float32"]
+        bulk_df[numeric_cols] = bulk_df[numeric_cols].fillna(0.0)
+        # sqlite3 won't bind numpy scalars (read_csv parses whole-number
+        # columns as int64); object dtype with None for missing values
+        # matches the driver's supported types.
+        bulk_df = bulk_df.astype(object).where(bulk_df.notna(), None)
+        add_records_bulk(list(bulk_df.itertuples(index=False, name=None)))
+        st.success(f"✅ Imported {len(bulk_df)} records!")
+
 def show_all_records():
     st.subheader("📋 All Records")
-    df = fetch_records()
-    if df.empty:
+    ids, df_display = get_display_records()
+    if df_display.empty:
         st.info("No records available.")
         return
 
-    ids = df["id"].tolist()
-    df_display = rename_columns(df).drop(columns=["id"])
-    df_display.index = df_display.index + 1
     st.dataframe(df_display, use_container_width=True)
 
-    selected_idx = st.selectbox("Select Record (by row number)", df_display.index.tolist())
-    selected_id = ids[selected_idx - 1]
+    selected_idx = st.selectbox("Select Record (by row number)", df_display.index)
+    # int() because sqlite3 won't bind a numpy integer as a parameter.
+    selected_id = int(ids[selected_idx - 1])
 
     st.markdown("### ✏️ Update Record")
     with st.form("update_form"):
-        record = df[df["id"]==selected_id].iloc[0]
+        record = fetch_record(selected_id)
         col1, col2, col3 = st.columns(3)
         with col1:
-            sno = st.text_input("S.No", record["sno"])
-            date_of_intervention = st.date_input("Date of Intervention", pd.to_datetime(record["date_of_intervention"]))
-            yard_location = st.text_input("Yard Location", record["yard_location"])
-            batchno = st.text_input("Batch No", record["batchno"])
-            hold_no = st.text_input("Hold No", record["hold_no"])
-            material = st.text_input("Material", record["material"])
+            sno = st.text_input("S.No", record["S.No"])
+            date_of_intervention = st.date_input("Date of Intervention", pd.to_datetime(record["Date Of Intervention"]))
+            yard_location = st.text_input("Yard Location", record["Yard Location"])
+            batchno = st.text_input("Batch No", record["Batch No."])
+            hold_no = st.text_input("Hold No", record["Hold No."])
+            material = st.text_input("Material", record["Material"])
         with col2:
-            lots_id = st.text_input("Lots ID", record["lots_id"])
-            sgs_reference_id = st.text_input("SGS Reference ID", record["sgs_reference_id"])
-            planned_qty = st.number_input("Planned Qty (Tons)", value=record["planned_qty"])
-            loaded_qty = st.number_input("Loaded Qty (Tons)", value=record["loaded_qty"])
-            balance_qty = st.number_input("Balance Qty (Tons)", value=record["balance_qty"])
-            dry_colour = st.text_input("Dry Colour", record["dry_colour"])
+            lots_id = st.text_input("Lots ID", record["Lots ID"])
+            sgs_reference_id = st.text_input("SGS Reference ID", record["SGS Reference ID"])
+            planned_qty = st.number_input("Planned Qty (Tons)", value=float(record["Planned Qty (Tons)"]))
+            loaded_qty = st.number_input("Loaded Qty (Tons)", value=float(record["Loaded Qty (Tons)"]))
+            balance_qty = st.number_input("Balance Qty (Tons)", value=float(record["Balance Qty (Tons)"]))
+            dry_colour = st.text_input("Dry Colour", record["Dry Colour"])
         with col3:
-            wet_colour = st.text_input("Wet Colour", record["wet_colour"])
-            loi = st.number_input("LOI", value=record["loi"])
-            mgo = st.number_input("MgO", value=record["mgo"])
-            sio2 = st.number_input("SiO₂", value=record["sio2"])
-            asbestos = st.text_input("Asbestos", record["asbestos"])
-            truck_no = st.text_input("Truck No", record["truck_no"])
-            remarks = st.text_area("Remarks", record["remarks"])
-            vessel_name = st.text_input("Vessel Name", record["vessel_name"])
-            sgs_report_id = st.text_input("SGS Report ID", record["sgs_report_id"])
+            wet_colour = st.text_input("Wet Colour", record["Wet Colour"])
+            loi = st.number_input("LOI", value=float(record["LOI"]))
+            mgo = st.number_input("MgO", value=float(record["MgO"]))
+            sio2 = st.number_input("SiO₂", value=float(record["SiO₂"]))
+            asbestos = st.text_input("Asbestos", record["Asbestos"])
+            truck_no = st.text_input("Truck No", record["Truck No."])
+            remarks = st.text_area("Remarks", record["Remarks"])
+            vessel_name = st.text_input("Vessel Name", record["Vessel Name"])
+            sgs_report_id = st.text_input("SGS Report ID", record["SGS Report ID"])
 
         if st.form_submit_button("💾 Save Changes"):
             data = (sno, str(date_of_intervention), yard_location, batchno, hold_no, material,
@@ -234,58 +461,78 @@ def show_all_records():
         delete_record(selected_id)
         st.warning("Record deleted successfully!")
 
-    today = datetime.today().strftime("%Y-%m-%d")
-    pdf_bytes = df_to_pdf_bytes(df_display)
-    st.markdown("### 📄 PDF Preview (Table shown above)")
-    st.download_button("📥 Download PDF", pdf_bytes, file_name=f"records_{today}.pdf", mime="application/pdf")
+    st.markdown("### 📄 PDF Export")
+    if st.button("📄 Generate PDF"):
+        today = datetime.today().strftime("%Y-%m-%d")
+        pdf_bytes = df_to_pdf_bytes(df_display)
+        st.download_button("📥 Download PDF", pdf_bytes, file_name=f"records_{today}.pdf", mime="application/pdf")
 
 # ----------------- Search & Reports -----------------
 def show_search_filter():
     st.subheader("🔎 Search & Filter Records")
     keyword = st.text_input("Enter keyword to search (Batch No / Material / Vessel)")
+    # Persist the last search so results (and the PDF button below)
+    # survive subsequent widget reruns.
     if st.button("Search"):
-        query = "SELECT * FROM products WHERE batchno LIKE ? OR material LIKE ? OR vessel_name LIKE ?"
-        df = fetch_records(query, (f"%{keyword}%", f"%{keyword}%", f"%{keyword}%"))
-        if df.empty:
+        st.session_state["search_keyword"] = keyword
+    keyword = st.session_state.get("search_keyword", "")
+    if keyword:
+        if _fts_enabled():
+            match = '"{}"*'.format(keyword.replace('"', '""'))
+            where = " WHERE id IN (SELECT rowid FROM products_fts WHERE products_fts MATCH ?)"
+            params = (match,)
+        else:
+            # Leading-wildcard LIKE can't use the B-tree indexes, so one
+            # scan is the floor here; FTS above is the real substring fix.
+            where = " WHERE batchno LIKE ? OR material LIKE ? OR vessel_name LIKE ?"
+            params = (f"%{keyword}%", f"%{keyword}%", f"%{keyword}%")
+        ids, df_display = fetch_display(where, params, columns=_SEARCH_DISPLAY_COLUMNS)
+        if df_display.empty:
             st.warning("⚠️ No records found.")
         else:
-            ids = df["id"].tolist()
-            df_display = rename_columns(df).drop(columns=["id"])
-            df_display.index = df_display.index + 1
             st.dataframe(df_display, use_container_width=True)
 
-            today = datetime.today().strftime("%Y-%m-%d")
-            pdf_bytes = df_to_pdf_bytes(df_display)
-            st.markdown("### 📄 PDF Preview (Table shown above)")
-            st.download_button("📥 Download PDF", pdf_bytes, file_name=f"search_results_{today}.pdf", mime="application/pdf")
+            st.markdown("### 📄 PDF Export")
+            if st.button("📄 Generate PDF"):
+                today = datetime.today().strftime("%Y-%m-%d")
+                pdf_bytes = df_to_pdf_bytes(df_display)
+                st.download_button("📥 Download PDF", pdf_bytes, file_name=f"search_results_{today}.pdf", mime="application/pdf")
 
-def show_reports():
-    st.subheader("📊 Reports & Analytics")
-    df = fetch_records()
-    if not df.empty:
-        df = rename_columns(df)
-        report_type = st.selectbox("Select Report Type", ["Material vs Loaded Qty", "Yard vs Planned Qty"])
-        if report_type == "Material vs Loaded Qty":
-            chart_data = df.groupby("Material")["Loaded Qty (Tons)"].sum()
-        else:
-            chart_data = df.groupby("Yard Location")["Planned Qty (Tons)"].sum()
+@st.cache_data(show_spinner=False)
+def render_report(report_type, db_version):
+    # The figure plus two savefig passes dominates this page; cache the
+    # rendered bytes so reruns that change nothing are a hash lookup.
+    if report_type == "Material vs Loaded Qty":
+        chart_data = agg_by("material", "loaded_qty", db_version=db_version)
+        chart_data.index.name = "Material"
+    else:
+        chart_data = agg_by("yard_location", "planned_qty", db_version=db_version)
+        chart_data.index.name = "Yard Location"
+    if chart_data.empty:
+        return None, None
 
-        fig, ax = plt.subplots()
-        chart_data.plot(kind="bar", ax=ax)
-        plt.xticks(rotation=45, ha="right")
-        st.pyplot(fig)
+    fig, ax = plt.subplots()
+    chart_data.plot(kind="bar", ax=ax)
+    plt.xticks(rotation=45, ha="right")
+    png_buf = io.BytesIO()
+    fig.savefig(png_buf, format="png", bbox_inches='tight')
+    pdf_buf = io.BytesIO()
+    fig.savefig(pdf_buf, format="pdf", bbox_inches='tight')
+    plt.close(fig)
+    return png_buf.getvalue(), pdf_buf.getvalue()
 
-        today = datetime.today().strftime("%Y-%m-%d")
-        img_bytes = io.BytesIO()
-        fig.savefig(img_bytes, format="png", bbox_inches='tight')
-        img_bytes.seek(0)
-        st.download_button("📥 Download Chart (PNG)", img_bytes, f"report_{today}.png", "image/png")
-        pdf_bytes = io.BytesIO()
-        fig.savefig(pdf_bytes, format="pdf", bbox_inches='tight')
-        pdf_bytes.seek(0)
-        st.download_button("📥 Download Chart (PDF)", pdf_bytes, f"report_{today}.pdf", "application/pdf")
-    else:
+def show_reports():
+    st.subheader("📊 Reports & Analytics")
+    report_type = st.selectbox("Select Report Type", ["Material vs Loaded Qty", "Yard vs Planned Qty"])
+    png_bytes, pdf_bytes = render_report(report_type, _db_version())
+    if png_bytes is None:
         st.info("No data available for reports.")
+        return
+
+    st.image(png_bytes)
+    today = datetime.today().strftime("%Y-%m-%d")
+    st.download_button("📥 Download Chart (PNG)", png_bytes, f"report_{today}.png", "image/png")
+    st.download_button("📥 Download Chart (PDF)", pdf_bytes, f"report_{today}.pdf", "application/pdf")
 
 # ----------------- Routing -----------------
 if menu == "➕ Add New Record":